@@ -1,36 +1,154 @@
 import sys
-from bs4 import BeautifulSoup
+import re
+import base64
+import codecs
+import locale
+import copy
+import tempfile
+import shutil
 from lib import urlReq
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 import lib.downloadDriver as Chrome
-from dominate.tags import *
-import dominate as dom
+import psutil
+from lib.driverPool import DriverPool
+from html import escape, unescape
 import time
 import os
-import multiprocessing
-header = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Safari/537.36",
-                        "Connection": "close"
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+header = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Safari/537.36"
                     }  # header
 img_names = []
-urlpaste = urlReq.Request()
-def func_init(txt_path,que,dir_name):
-    exch=[]
-    with open(txt_path,'r') as f:
-        while True:
-            line = f.readline()
-            if line:
-                url=line.replace('\n','')
-                if url not in exch:
-                    que.put(url)
-                exch.append(url)
-            else:
-                break
-        f.close()
+TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.I|re.S)
+TITLE_READ_SIZE = 65536
+PROBE_DRAIN_SIZE = 262144  # 读完标题后继续读取剩余响应的上限(256KB),读完则连接归还连接池复用,超出则关闭连接
+ENCODING_PROBE_SIZE = 65536  # 判断url文件编码时读取的字节数
+REPORT_TEMPLATE = '''<!DOCTYPE html>
+<html>
+  <head>
+    <title>result_{now_time}</title>
+    <meta charset="utf-8">
+  </head>
+  <body>
+    <div align="center" id="content">
+      <table align="center" border="1">
+        <tbody>
+          <tr align="center">
+            <td colspan="7">url探测结果</td>
+          </tr>
+          <tr align="center" bgcolor="#0080FF" style="color:white">
+            <td>url详情</td>
+            <td>截图</td>
+          </tr>
+{rows}
+        </tbody>
+      </table>
+    </div>
+  </body>
+</html>
+'''  # html报表模板
+JS_HIDE_WEBDRIVER = "Object.defineProperty(navigator, 'webdriver', {get: () => false})"
+JS_STOP_LOADING = 'window.stop();'
+JS_RENDER_HELPER = '''
+window.__eyeurlWaitRender = function (quietMs, maxMs, done) {
+    var finished = false, timer, observer, resources;
+    function finish() {
+        if (finished) return;
+        finished = true;
+        clearTimeout(timer);
+        observer.disconnect();
+        if (resources) resources.disconnect();
+        done();
+    }
+    function quiet() {
+        var pending = Array.prototype.filter.call(document.images, function (img) {
+            return !img.complete && img.loading !== 'lazy';
+        });
+        if (!pending.length) return finish();
+        pending.forEach(function (img) {
+            img.addEventListener('load', settle, {once: true});
+            img.addEventListener('error', settle, {once: true});
+        });
+    }
+    function settle() { clearTimeout(timer); timer = setTimeout(quiet, quietMs); }
+    observer = new MutationObserver(settle);
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    if (window.PerformanceObserver) {
+        resources = new PerformanceObserver(settle);
+        resources.observe({type: 'resource'});
+    }
+    settle();
+    setTimeout(finish, maxMs);
+};
+'''  # DOM无变化且无新资源加载完成持续quietMs即认为渲染完成,不必等待load事件,最多等待maxMs;随新文档注入,每个url只需发送下面的短脚本
+JS_WAIT_RENDER = '''
+var callback = arguments[arguments.length - 1];
+function done() { callback(document.title); }
+if (window.__eyeurlWaitRender) window.__eyeurlWaitRender(arguments[0], arguments[1], done); else done();
+'''  # 渲染等待结束时顺带返回浏览器中的标题
+RENDER_QUIET_MS = 500
+IO_WORKERS = 2  # 后台写截图的线程数
+CHROME_FLAGS = ['--disable-dev-shm-usage','--disable-extensions',
+                '--disable-background-networking','--disable-default-apps',
+                '--disable-sync','--disable-translate','--mute-audio',
+                '--no-first-run','--disable-breakpad','--disable-crash-reporter',
+                '--disable-renderer-backgrounding',
+                '--disable-backgrounding-occluded-windows',
+                '--disable-background-timer-throttling','--disable-component-update',
+                '--no-default-browser-check','--disable-client-side-phishing-detection',
+                '--disable-ipc-flooding-protection',
+                '--disable-component-extensions-with-background-pages',
+                '--disable-features=TranslateUI']  # 关闭截图用不到的浏览器功能
+def ext_patterns(*exts):
+    return [pattern for ext in exts for pattern in ('*://*/*.'+ext,'*://*/*.'+ext+'?*')]  # 匹配以该扩展名结尾(可带查询参数)的url,不误拦域名中含扩展名的站点;通配符*同样匹配?,如view.php?img=a.png也会命中
+
+def host_patterns(*hosts):
+    return [pattern for host in hosts for pattern in ('*://'+host+'/*','*://*.'+host+'/*')]  # 只匹配该域名及其子域名,不误拦域名或路径中含相同字符串的站点
+
+def block_regex(patterns):
+    return re.compile('|'.join('.*'.join(map(re.escape,pattern.split('*'))) for pattern in patterns))  # 与Network.setBlockedURLs相同的通配规则,用于判断目标url本身是否会被拦截
+
+BLOCK_PATTERNS = {
+    'image': ext_patterns('png','jpg','jpeg','gif','webp','svg','ico','bmp'),
+    'font': ext_patterns('woff','woff2','ttf','otf','eot'),
+    'media': ext_patterns('mp4','webm','ogg','mp3','m3u8','flv'),
+    'ads': host_patterns('googlesyndication.com','doubleclick.net','google-analytics.com','googletagmanager.com',
+                         'hm.baidu.com','cnzz.com','51.la','pos.baidu.com','cpro.baidustatic.com'),
+}  # -block可拦截的资源类型及对应的url通配符
+CACHE_SIZE = 268435456  # -cache模式下每个浏览器的磁盘缓存上限(256MB)
+THUMB_SCALE = 0.5  # 缩略图缩放比例,1600px宽的截图缩为报表展示的800px
+BROWSER_MEMORY = 262144000  # 每个浏览器大约占用的内存(250MB),用于按可用内存限制线程数
+BROWSER_POOL_RECYCLE_AFTER = 100  # 浏览器处理多少个url后重启
+BROWSER_POOL_MAX_AGE = 600  # 浏览器运行多少秒后重启
+urlpaste = urlReq.Request()  # 所有线程共用一个连接池
+def detect_encoding(txt_path):
+    '''
+    只读取文件开头的ENCODING_PROBE_SIZE字节判断编码,utf-8(含BOM)解码失败时按系统默认编码(中文Windows下为gbk)处理,避免整个文件按不同编码反复读取
+    '''
+    with open(txt_path,'rb') as f:
+        raw=f.read(ENCODING_PROBE_SIZE)
+    try:
+        codecs.getincrementaldecoder('utf-8-sig')().decode(raw)  # 增量解码,截断在多字节字符中间时不会报错
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return locale.getpreferredencoding(False)
+
+def func_init(txt_path,dir_name):
+    urls={}  # dict同时负责去重和保持输入顺序,不再额外保存一份列表
+    with open(txt_path,'r',encoding=detect_encoding(txt_path),errors='replace') as f:
+        for line in f:
+            url=line.rstrip('\r\n')
+            if url and url not in urls:
+                urls[url]=None
     dir_mk(os.getcwd()+'/result')
     dir_mk(dir_name)
     dir_mk(dir_name +'/data')
+    return list(urls)
 
 def dir_mk(path):
     if os.path.exists(path):
@@ -39,112 +157,215 @@ def dir_mk(path):
     else:
         os.mkdir(path)
 
-def reqProcess(urlpaste,que,lock,m_dict,timeout,wait_time,dir_name):
-    with lock:
-        option = webdriver.ChromeOptions()
-        option.add_argument('--window-size=1600,800')  # 设置option
-        option.page_load_strategy = 'eager'  # 设置option
-        option.add_argument('--headless=old')  # 设置option
-        option.add_argument('--disable-gpu')  # 设置option
+def chrome_options(cache=False):
+    option = webdriver.ChromeOptions()
+    option.add_argument('--window-size=1600,800')  # 设置option
+    option.page_load_strategy = 'eager'  # 设置option
+    option.add_argument('--headless=new')  # 设置option
+    option.add_argument('--disable-gpu')  # 设置option
+    if cache:
+        option.add_argument('--disk-cache-size={0}'.format(CACHE_SIZE))  # 开启磁盘缓存,公共静态资源只需下载一次
+    else:
         option.add_argument('--incognito')  # 设置option
-        option.add_argument('--ignore-certificate-errors')  # 设置option
-        option.add_experimental_option('excludeSwitches', ['enable-logging'])  # 设置option
-        path=r"chromedriver_win32\chromedriver-win32\chromedriver.exe"
-        driver = webdriver.Chrome(service=Service(executable_path=path),options=option)
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": "Object.defineProperty(navigator, 'webdriver', {get: () => False}) "})
+    option.add_argument('--ignore-certificate-errors')  # 设置option
+    for flag in CHROME_FLAGS:
+        option.add_argument(flag)
+    option.add_experimental_option('excludeSwitches', ['enable-logging'])  # 设置option
+    return option
+
+def new_driver(timeout,option,slot,cache_dir=None,blocked_urls=()):
+    if cache_dir:  # 每个浏览器固定使用自己的用户目录,浏览器重启后缓存仍然可用
+        option = copy.deepcopy(option)
+        option.add_argument('--user-data-dir={0}'.format(os.path.join(cache_dir,'w{0}'.format(slot))))
+    path=r"chromedriver_win32\chromedriver-win32\chromedriver.exe"
+    driver = webdriver.Chrome(service=Service(executable_path=path),options=option)
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": JS_HIDE_WEBDRIVER})
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": JS_RENDER_HELPER})
+    driver.set_page_load_timeout(timeout)  # 页面加载超时与请求超时保持一致,避免卡死进程
+    driver.set_script_timeout(timeout)
+    if blocked_urls:  # 浏览器直接拦截这些资源,不发起请求
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(blocked_urls)})
+    return driver
+
+def set_blocked(driver,blocked_urls):
+    try:
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(blocked_urls)})
+    except WebDriverException:
+        pass
+
+def reqProcess(que,pool,results_lock,m_dict,timeout,wait_time,data_dir,shot_params,thumb,io_executor,probe_executor,blocked_urls,blocked_re):
     while True:
-        if not que.empty():
-            url = que.get()
-            num=que.qsize()+1
-            req(urlpaste,url, header, driver, m_dict,timeout,wait_time,num,dir_name)
-        else:
-            driver.quit()
+        item = que.get()
+        if item is None:  # 哨兵,队列已取完
             break
+        num,url = item  # num为url在文件中的序号,用作截图编号
+        driver = pool.checkout()
+        try:  # 无论本url是否出错都要归还浏览器,避免线程退出后浏览器进程残留
+            if driver is None:  # 浏览器重启失败,本url记为失败
+                print("[x] 探测url:{0}失败:没有可用的浏览器".format(url))
+                with results_lock:
+                    m_dict[url]=("连接失败",'x_x!','')
+                continue
+            unblock = blocked_re is not None and blocked_re.fullmatch(url.split('#')[0]) is not None
+            if unblock:  # 目标url本身匹配-block规则时本次临时取消拦截,否则截到的是浏览器错误页
+                set_blocked(driver,[])
+            req(url, header, driver, results_lock, m_dict,timeout,wait_time,num,data_dir,shot_params,thumb,io_executor,probe_executor)
+            if unblock:
+                set_blocked(driver,blocked_urls)
+            try:  # 浏览器在url之间复用,清除cookie避免上一个站点的登录态等影响下一个url
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            except WebDriverException:
+                pass
+        finally:
+            pool.checkin(driver)
     
 
-def req(urlpaste,url,header,driver,m_dict,timeout,wait_time,num,dir_name):
+def probe(url,header,timeout):
+    resp = urlpaste.req_get(url, verify=False,header=header,allow_redirects=True,timeout=timeout,stream=True)
+    try:
+        status_code=resp.history[0].status_code if resp.history else resp.status_code  # 跳转前的原始状态码
+        head = resp.raw.read(TITLE_READ_SIZE, decode_content=True)  # 标题位于<head>内,页面由浏览器渲染,无需下载完整响应
+        try:  # 剩余部分较小时读完,连接可被后续请求复用;较大的页面直接关闭连接
+            resp.raw.read(PROBE_DRAIN_SIZE, decode_content=True)
+        except Exception:  # 状态码和标题已经拿到,读取剩余部分出错只影响连接复用,不影响探测结果
+            pass
+    finally:
+        resp.close()
+    res_title = TITLE_RE.search(head)
+    if res_title:
+        res_title = ' '.join(unescape(res_title.group(1).decode('utf-8','replace')).split())
+    return status_code,resp.status_code,res_title
+
+def req(url,header,driver,results_lock,m_dict,timeout,wait_time,num,data_dir,shot_params,thumb,io_executor,probe_executor):
+    entry = ("连接失败",'x_x!','')
     try:
-        resp = urlpaste.req_get(url, verify=False, header=header,allow_redirects=False,timeout=timeout)
-        if resp.status_code!=200:
-            status_code=resp.status_code
-            resp = urlpaste.req_get(url, verify=False,header=header,allow_redirects=True,timeout=timeout)
-        else:
-            status_code=resp.status_code
-        resp.encoding = 'utf-8'
-        soup = BeautifulSoup(resp.text, features='xml')
-        res_title = soup.find("title")
-        driver.get(url)
-        time.sleep(wait_time)
-        img_path='{0}.png'.format(str(num))
-        driver.save_screenshot(dir_name+'/data/'+img_path)
-        #m_screenshots.update({img_path: img})
-        if res_title:
-            print("[+] 已探测url:{0},状态码:{1},站点标题:{2}".format(url,status_code,soup.title.text))
-            m_dict.update({url:[resp.status_code, soup.title.text,img_path]})
-        else:
-            print("[+] 已探测url:{0},状态码:{1},站点标题:{2}".format(url, resp.status_code, '未获取到标题'))
-            m_dict.update({url: [resp.status_code,'未获取到标题',img_path]})
+        probe_future = probe_executor.submit(probe,url,header,timeout)  # http探测与浏览器截图同时进行
+        try:
+            driver.get(url)
+        except TimeoutException:  # 加载超时不再整体判定失败,停止加载后截取已渲染的内容
+            driver.execute_script(JS_STOP_LOADING)
+        page_title = ''
+        try:  # 页面渲染完成即截图,最多等待wait_time秒
+            page_title = driver.execute_async_script(JS_WAIT_RENDER, RENDER_QUIET_MS, wait_time*1000)
+        except TimeoutException:
+            pass
+        img_path='{0}.{1}'.format(num,shot_params['format'])
+        shot = driver.execute_cdp_cmd('Page.captureScreenshot', shot_params)  # 直接走CDP截图,不经过WebDriver协议
+        thumb_shot = None
+        if thumb:
+            viewport = driver.execute_cdp_cmd('Page.getLayoutMetrics', {})['cssLayoutViewport']
+            clip = {'x': 0, 'y': 0, 'width': viewport['clientWidth'], 'height': viewport['clientHeight'], 'scale': THUMB_SCALE}
+            thumb_shot = driver.execute_cdp_cmd('Page.captureScreenshot', dict(shot_params, clip=clip))  # 由浏览器直接输出缩略图
+        status_code,final_code,res_title = probe_future.result()
+        io_executor.submit(write_shot,data_dir+img_path,shot['data'])  # 探测成功后才写盘,失败的url不会在data目录留下截图;解码写盘交给后台线程,浏览器继续处理下一个url
+        if thumb_shot:
+            io_executor.submit(write_shot,data_dir+thumb_path(img_path),thumb_shot['data'])
+        res_title = res_title or ' '.join((page_title or '').split()) or '未获取到标题'  # 标题由js生成时使用浏览器中的标题
+        print("[+] 已探测url:{0},状态码:{1},站点标题:{2}".format(url,status_code,res_title))
+        entry = (final_code,res_title,img_path)
     except Exception as e:
-        print("[x] 探测url:{0}失败:网站连接超时".format(url))
-        m_dict.update({url: ["连接失败",'x_x!','']})
+        print("[x] 探测url:{0}失败:{1}".format(url,type(e).__name__))  # 只输出异常类型,不打印完整堆栈
+    finally:
+        with results_lock:
+            m_dict[url]=entry
 
-def report(m_dict,now_time):
+def write_shot(path,data):
+    try:
+        with open(path,'wb') as f:
+            f.write(base64.b64decode(data))
+    except Exception as e:
+        print("[x] 截图保存失败:{0},{1}".format(path,e))
+
+def thumb_path(img_path):
+    name,ext=os.path.splitext(img_path)
+    return name+'_thumb'+ext
+
+def img_cell(img_path,thumb):
+    if thumb and img_path:  # 展示缩略图,点击查看原图
+        return f'<a href="data/{escape(img_path)}" target="_blank"><img src="data/{escape(thumb_path(img_path))}" style="width:800px;hight:200px"></a>'
+    return f'<img src="data/{escape(img_path)}" style="width:800px;hight:200px">'
+
+def report(m_dict,now_time,thumb=False):
+    lines=[]
+    rows=[]
+    for url,(resp_code,resp_title,img_path) in m_dict.items():  # txt和html报表在同一次遍历中生成
+        lines.append(f'{url}\t{resp_code}\t{resp_title}\tdata/{img_path}\n')
+        rows.append(f'          <tr align="center"><td><a href="{escape(url)}" target="_blank">{escape(url)}</a> {resp_code} {escape(resp_title)}</td>'
+                    f'<td>{img_cell(img_path,thumb)}</td></tr>')
     with open('result/result_{0}/result_{1}.txt'.format(now_time,now_time),'w',encoding='utf-8') as f:
-        for url,[resp_code,resp_title,img_path] in m_dict.items():
-            f.write('{0}\t{1}\t{2}\t{3}\n'.format(url,resp_code,resp_title,'data/'+img_path))
+        f.write(''.join(lines))
         f.close()
-    doc = dom.document(title='result_{0}'.format(now_time))
-    with doc.head:
-        meta(charset='utf-8')
-    with doc.add(body()).add(div(id='content',align="center")):
-        with table(border='1',align="center").add(tbody()):
-            # 生成报表头部
-            with tr(align='center'):
-                td(colspan="7").add('url探测结果')
-            l = tr(align="center", bgcolor="#0080FF", style="color:white")
-
-            l += td('url详情')
-            l += td('截图')
-            # 插入表格数据
-            for url,[resp_code,resp_title,img_path] in m_dict.items():
-                l = tr(align='center')
-                with l:
-                    td(a(url,href=url,target="_blank"),' '+str(resp_code)+' '+resp_title)
-                    td(img(src='data/{0}'.format(img_path),style='width:800px;hight:200px'))
     with open('result/result_{0}/result_{1}.html'.format(now_time,now_time),'w',encoding='utf-8') as f:
-        f.write(doc.render())
+        f.write(REPORT_TEMPLATE.format(now_time=now_time,rows='\n'.join(rows)))
         f.close()
 
-def mainFunc(txt_path,timeout,wait_time,process_rate):
-    old_time=time.time()
+def mainFunc(txt_path,timeout,wait_time,process_rate,img_format='png',quality=80,thumb=False,cache=False,block=()):
+    '''
+    img_format为png/jpeg/webp,jpeg和webp按quality有损压缩,截图体积通常只有png的1/3~1/5;webp需较新的浏览器才能在报表中查看
+    thumb为True时额外保存缩小一半的缩略图用于报表展示,点击缩略图查看原图
+    cache为True时浏览器不再使用无痕模式,而是在临时目录中保留磁盘缓存,多个url共用的js/css/字体等资源不再重复下载;缓存目录按本次运行区分,同时运行多个实例互不冲突,运行结束后删除
+    block为不加载的资源类型(BLOCK_PATTERNS的键),用于只关心页面布局、标题的场景,被拦截的图片等不会出现在截图中
+    '''
+    old_time=time.perf_counter()
     print('************url探测开始************')
-    process_list=[]
-    m=multiprocessing.Manager()
-    m_dict=m.dict()
-    #m_screenshots=m.dict()
-    m_que=m.Queue()
+    m_dict={}
+    results_lock=threading.Lock()
+    m_que=queue.Queue()
     now_time = str(time.time_ns())
     dir_name = os.getcwd() + '/result/result_' + now_time  # 截图保存的目录
-    func_init(txt_path,m_que,dir_name)
-    if m_que.qsize()<5:
-        process_rate=m_que.qsize()
-    lock=m.Lock()
+    urls=func_init(txt_path,dir_name)
+    data_dir=dir_name+'/data/'  # 截图文件所在目录,各线程直接拼接文件名
+    process_rate=min(process_rate,len(urls))
+    mem_rate=max(psutil.virtual_memory().available//BROWSER_MEMORY,1)  # 浏览器过多会耗尽内存,按可用内存限制线程数
+    if process_rate>mem_rate:
+        print('[!] 可用内存仅够运行{0}个浏览器,线程数由{1}调整为{0}'.format(mem_rate,process_rate))
+        process_rate=mem_rate
+    for item in enumerate(urls,1):
+        m_que.put(item)
     for i in range(process_rate):
-        process=multiprocessing.Process(target=reqProcess,args=(urlpaste,m_que,lock,m_dict,timeout,wait_time,dir_name))
-        process_list.append(process)
-    for i in process_list:
-        i.start()
-    for i in process_list:
-        i.join()
+        m_que.put(None)
+    shot_params={'format':img_format}  # CDP截图参数
+    if img_format!='png':
+        shot_params['quality']=quality
+    if img_format=='jpeg':
+        shot_params['optimizeForSpeed']=True  # jpeg编码优先速度
+    cache_dir=os.path.join(tempfile.gettempdir(),'eyeurl-cache',now_time) if cache else None
+    blocked_urls=[pattern for kind in block for pattern in BLOCK_PATTERNS[kind]]
+    blocked_re=block_regex(blocked_urls) if blocked_urls else None
+    pool=None
+    io_executor=ThreadPoolExecutor(max_workers=IO_WORKERS)
+    probe_executor=ThreadPoolExecutor(max_workers=max(process_rate,1))
+    try:
+        pool=DriverPool(partial(new_driver,timeout,chrome_options(cache),cache_dir=cache_dir,blocked_urls=blocked_urls),process_rate,recycle_after=BROWSER_POOL_RECYCLE_AFTER,max_age=BROWSER_POOL_MAX_AGE)  # 预先启动浏览器
+        with ThreadPoolExecutor(max_workers=max(process_rate,1)) as executor:
+            futures=[executor.submit(reqProcess,m_que,pool,results_lock,m_dict,timeout,wait_time,data_dir,shot_params,thumb,io_executor,probe_executor,blocked_urls,blocked_re) for i in range(process_rate)]
+            try:
+                while wait(futures,timeout=1).not_done:  # 带超时等待,主线程可以及时响应Ctrl+C
+                    pass
+            except KeyboardInterrupt:  # 清空待探测的url,各线程处理完当前url后退出,已探测的结果照常生成报表
+                print('\n[!] 用户中断,等待正在探测的url结束后生成报表')
+                while True:
+                    try:
+                        m_que.get_nowait()
+                    except queue.Empty:
+                        break
+                for i in range(process_rate):
+                    m_que.put(None)
+            for future in futures:
+                future.result()
+    finally:
+        if pool is not None:
+            pool.close()
+        if cache_dir:  # 浏览器已全部退出,删除本次运行的缓存目录
+            shutil.rmtree(cache_dir,ignore_errors=True)
+        probe_executor.shutdown(wait=True)  # 浏览器出错提前返回的url,其探测可能仍在使用连接池,等待结束后再关闭
+        urlpaste.close()
+        io_executor.shutdown(wait=True)  # 等待截图全部写入后再生成报表
     print('************url探测结束,请耐心等待报表生成~************\n')
-    #for key,value in m_screenshots.items():
-    #    with open(dir_name+'/data/'+key, 'wb') as f:
-    #        f.write(value)
-    #        f.close()
     print("报表生成完毕，报表所在位置:{0}".format(dir_name))
-    report(m_dict,now_time)
-    new_time=time.time()
+    report(m_dict,now_time,thumb)
+    new_time=time.perf_counter()
     cost_time=new_time-old_time
     print("去重后，url探测共计：{0}个,共耗时{1}秒,感谢使用~".format(len(m_dict),int(cost_time)))
 
@@ -153,8 +374,13 @@ if __name__=='__main__':
         print('\n-------------欢迎使用本程序，帮助内容如下:------------\n  作者：云小书 公众号：恒运安全 参数说明:\n')
         print('\t-f\t\t需要探测的url所在的文件')
         print('\t-t\t\t线程数,默认5,建议不要超过10')
-        print('\t-delay\t\t网页截图等待时间(s),默认1s,建议不要太大')
+        print('\t-delay\t\t网页截图最长等待时间(s),页面加载完成即截图,默认1s')
         print('\t-timeout\t\t网页连接超时时间(s),默认30s,建议不要太大')
+        print('\t-img\t\t截图格式png/jpeg/webp,默认png,jpeg/webp体积更小')
+        print('\t-quality\t\t截图质量(1-100),仅对jpeg/webp生效,默认80')
+        print('\t-thumb\t\t报表使用缩略图展示,减小报表加载体积')
+        print('\t-cache\t\t保留浏览器磁盘缓存,url较多且共用静态资源时可加快速度;缓存写入系统临时目录的eyeurl-cache下,运行结束后删除,程序被强制结束时需手动删除')
+        print('\t-block\t\t不加载的资源类型,逗号分隔,可选image/font/media/ads(广告与统计脚本),如:-block font,media,ads')
         print('\t挂代理请在cmd内执行(ip、端口自行更改)：set http_proxy=http://127.0.0.1:7890')
         print('\t请注意：本程序自动url去重')
         sys.exit()
@@ -165,11 +391,22 @@ if __name__=='__main__':
     parser.add_help=True
     parser.add_argument('-f',type=str,required=True,help='需要探测的url所在的文件')
     parser.add_argument('-t',type=int,default=5,help='线程数,默认5,建议不要超过10')
-    parser.add_argument('-delay',type=int,default=1,help='网页截图等待时间(s),默认1s,建议不要太大')
+    parser.add_argument('-delay',type=int,default=1,help='网页截图最长等待时间(s),页面加载完成即截图,默认1s')
     parser.add_argument('-timeout',type=int,default=30,help='网页连接超时时间(s),默认30s,建议不要太大')
+    parser.add_argument('-img',type=str,default='png',choices=['png','jpeg','webp'],help='截图格式png/jpeg/webp,默认png,jpeg/webp体积更小')
+    parser.add_argument('-quality',type=int,default=80,help='截图质量(1-100),仅对jpeg/webp生效,默认80')
+    parser.add_argument('-thumb',action='store_true',help='报表使用缩略图展示,减小报表加载体积')
+    parser.add_argument('-cache',action='store_true',help='保留浏览器磁盘缓存,url较多且共用静态资源时可加快速度;缓存写入系统临时目录的eyeurl-cache下,运行结束后删除,程序被强制结束时需手动删除')
+    parser.add_argument('-block',type=str,default='',help='不加载的资源类型,逗号分隔,可选image/font/media/ads(广告与统计脚本),如:-block font,media,ads')
     args=parser.parse_args()
     txt_path=args.f
     process_rate=args.t
     timeout=args.timeout
     wait_time=args.delay
-    mainFunc(txt_path,timeout,wait_time,process_rate)
+    block=[kind for kind in args.block.split(',') if kind]
+    for kind in block:
+        if kind not in BLOCK_PATTERNS:
+            parser.error('-block可选值为:{0}'.format('/'.join(BLOCK_PATTERNS)))
+    if not 1<=args.quality<=100:  # 超出范围时浏览器会拒绝截图,每个url都会失败
+        parser.error('-quality取值范围为1-100')
+    mainFunc(txt_path,timeout,wait_time,process_rate,args.img,args.quality,args.thumb,args.cache,block)
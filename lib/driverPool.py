@@ -0,0 +1,82 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DriverPool:
+    '''
+    预先启动的浏览器池,浏览器在多个url之间复用,使用recycle_after次或运行超过max_age秒后关闭并重新启动,防止浏览器内存持续增长
+    同一时间最多launch_limit个浏览器在启动,避免大量浏览器同时启动抢占资源
+    factory接收浏览器的槽位号,重启后的浏览器沿用原槽位号(可用于固定每个浏览器的用户目录)
+    重启失败的槽位以None放回池中,下次取出时再尝试启动,仍失败则checkout返回None,由调用方跳过该url
+    '''
+    def __init__(self,factory,size,recycle_after=100,launch_limit=2,max_age=None):
+        self.factory=factory
+        self.recycle_after=recycle_after
+        self.max_age=max_age
+        self.launch_sem=threading.Semaphore(launch_limit)
+        self.idle=queue.Queue()
+        self.uses={}
+        self.slots={}
+        self.started={}
+        self.dead=[]  # 启动失败的槽位
+        with ThreadPoolExecutor(max_workers=launch_limit) as executor:
+            for driver in executor.map(self.relaunch,range(size)):  # 启动失败的槽位与重启失败一样以None占位
+                self.idle.put(driver)
+        if size and len(self.dead)==size:
+            self.close()
+            raise RuntimeError('浏览器全部启动失败')
+
+    def launch(self,slot):
+        with self.launch_sem:
+            driver=self.factory(slot)
+        self.slots[driver]=slot
+        self.started[driver]=time.monotonic()
+        return driver
+
+    def relaunch(self,slot):
+        try:
+            return self.launch(slot)
+        except Exception as e:  # chromedriver启动失败不影响其他浏览器,槽位留待下次取出时重试
+            print("[x] 浏览器{0}启动失败:{1}".format(slot,type(e).__name__))
+            self.dead.append(slot)
+            return None
+
+    def quit(self,driver):
+        try:
+            driver.quit()
+        except Exception:  # 浏览器已崩溃或chromedriver已退出时quit会报错,进程已不存在,忽略即可
+            pass
+
+    def checkout(self):
+        driver=self.idle.get()
+        if driver is None:
+            driver=self.relaunch(self.dead.pop())
+        return driver
+
+    def checkin(self,driver):
+        if driver is None:
+            self.idle.put(None)
+            return
+        uses=self.uses.pop(driver,0)+1
+        expired=self.max_age is not None and time.monotonic()-self.started[driver]>=self.max_age
+        if uses>=self.recycle_after or expired:
+            slot=self.slots.pop(driver)
+            self.started.pop(driver)
+            self.quit(driver)
+            driver=self.relaunch(slot)
+            uses=0
+        if driver is not None:
+            self.uses[driver]=uses
+        self.idle.put(driver)
+
+    def close(self):
+        while not self.idle.empty():
+            driver=self.idle.get()
+            if driver is not None:
+                self.quit(driver)
+        self.uses.clear()
+        self.slots.clear()
+        self.started.clear()
+        self.dead.clear()
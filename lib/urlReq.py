@@ -1,15 +1,19 @@
 import requests as rq
+from requests.adapters import HTTPAdapter
 from requests.packages import urllib3
 
 class Request:
-    def __init__(self):
+    def __init__(self,pool_size=100):
         urllib3.disable_warnings()
         self.s=rq.Session()
-    def req_get(self,url,header='',allow_redirects=True,verify=False,timeout=3):
-        resp=self.s.get(url,headers=header,verify=verify, timeout=timeout,allow_redirects=allow_redirects)
-        self.s.close()
+        adapter=HTTPAdapter(pool_connections=pool_size,pool_maxsize=pool_size,max_retries=0)  # 复用连接,同一站点无需重复握手
+        self.s.mount('http://',adapter)
+        self.s.mount('https://',adapter)
+    def req_get(self,url,header='',allow_redirects=True,verify=False,timeout=3,stream=False):
+        resp=self.s.get(url,headers=header,verify=verify, timeout=timeout,allow_redirects=allow_redirects,stream=stream)
         return resp
     def req_post(self,url,header='',data='',allow_redirects=True,verify=False,timeout=3):
         resp = self.s.post(url, headers=header,data=data,verify=verify, timeout=timeout,allow_redirects=allow_redirects)
-        self.s.close()
         return resp
+    def close(self):
+        self.s.close()